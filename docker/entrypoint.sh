@@ -20,6 +20,7 @@ python manage.py makemigrations helios --noinput
 python manage.py makemigrations heliosauth --noinput
 python manage.py makemigrations zeus --noinput
 python manage.py migrate --noinput
+python manage.py createcachetable
 python manage.py collectstatic --noinput -l
 
 python init_admin.py GRNET admin admin
@@ -8,6 +8,7 @@ Ben Adida
 """
 
 from django.db import models
+from django.utils.functional import cached_property
 from jsonfield import JSONField
 from helios.fields import SeparatedValuesField
 
@@ -87,12 +88,12 @@ class User(models.Model):
     # any group name contains forum
     return any(filter(lambda x: "forum" in x.lower(), groups))
 
-  @property
+  @cached_property
   def eligible_election_types(self):
       valid = set()
       for group in self.user_groups.all():
           map(valid.add, group.election_types)
-      return valid
+      return frozenset(valid)
 
   # administrator
   admin_p = models.BooleanField(default=False)
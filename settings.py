@@ -29,6 +29,22 @@ DATABASES = {
     }
 }
 
+# Cached terms, admin listing counts and demo rate limits must be visible to
+# every web worker and celery process, so the default cache is shared through
+# the database. Create the table with `python manage.py createcachetable`.
+# Demo rate limits are kept per client address, so the cache must hold far
+# more live entries than the Django default of 300; otherwise requests from
+# many addresses would cull the limits of the others.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'zeus_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    }
+}
+
 # Local time zone for this installation. Choices can be found here:
 # http://en.wikipedia.org/wiki/List_of_tz_zones_by_name
 # although not all choices may be available on all operating systems.
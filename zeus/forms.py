@@ -4,24 +4,28 @@ Forms for Zeus
 """
 import re
 import uuid
-import copy
 import json
-import types
 
 from collections import defaultdict
+from itertools import chain
+from functools import partial
 from datetime import datetime, timedelta
 
 from django import forms
 from django.core.urlresolvers import reverse
 from django.core.validators import URLValidator
 from django.core.exceptions import ValidationError
-from django.utils.translation import ugettext_lazy as _
+from django.utils.translation import ugettext_lazy as _, get_language
+from django.utils.lru_cache import lru_cache
 from django.contrib.admin import widgets
 from django.db import transaction
+from django.core.cache import cache
 from django.conf import settings
 from django.db.models import Q
 from django.utils.safestring import mark_safe
+from django.utils.functional import cached_property, lazy
 from django.contrib.auth.hashers import check_password, make_password
+from django.utils.crypto import salted_hmac
 from django.forms.models import BaseModelFormSet
 from django.forms.widgets import Select, MultiWidget, DateInput, TextInput,\
     HiddenInput
@@ -30,7 +34,8 @@ from django.forms.formsets import BaseFormSet
 from helios.models import Election, Poll, Trustee, Voter
 from heliosauth.models import User
 
-from zeus.utils import extract_trustees, election_trustees_to_text, resolve_terms_options
+from zeus.utils import extract_trustees, election_trustees_to_text, \
+    cached_terms_options, terms_cache_key, TERMS_CACHE_TIMEOUT
 from zeus.widgets import JqSplitDateTimeField, JqSplitDateTimeWidget
 from zeus import help_texts as help
 from zeus.utils import undecalize, ordered_dict_prepend
@@ -42,7 +47,7 @@ from zeus import taxisnet
 from zeus.utils import parse_markdown_unsafe
 
 
-LOG_CHANGED_FIELDS = [
+LOG_CHANGED_FIELDS = (
     "name",
     "voting_starts_at",
     "voting_ends_at",
@@ -50,9 +55,67 @@ LOG_CHANGED_FIELDS = [
     "description",
     "help_email",
     "help_phone"
-]
+)
+LOG_CHANGED_FIELDS_SET = frozenset(LOG_CHANGED_FIELDS)
 
 INVALID_CHAR_MSG = _("%s is not a valid character.")
+INVALID_CHARS_RE = re.compile(r'[%]')
+
+
+def check_invalid_chars(value):
+    match = INVALID_CHARS_RE.search(value)
+    if match:
+        raise forms.ValidationError(INVALID_CHAR_MSG % match.group())
+
+# plain ascii addresses, a strict subset of what validate_email accepts
+SIMPLE_EMAIL_RE = re.compile(
+    r"^[A-Za-z0-9_%+-]+(?:\.[A-Za-z0-9_%+-]+)*@"
+    r"(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}\Z")
+
+
+def _cached_terms_html(owner, lang):
+    key = terms_cache_key(owner.pk, 'html-%s' % lang)
+    html = cache.get(key)
+    if html is None:
+        terms_options = cached_terms_options(owner)
+        html = parse_markdown_unsafe(_(terms_options.get('terms_text')))
+        cache.set(key, html, TERMS_CACHE_TIMEOUT)
+    return html
+
+
+lazy_terms_html = lazy(_cached_terms_html, unicode)
+
+_LANG_CHOICES = [(code, _(name)) for code, name in
+                 getattr(settings, 'LANGUAGES', [])]
+
+DEPS_LABELS = {
+    'unicouncilsgr': _('Departments'),
+    'stv': _('Constituencies'),
+}
+
+DEPS_HELP_TEXTS = {
+    'unicouncilsgr': _("University Schools. e.g."
+                       "<br/><br/> School of Engineering <br />"
+                       "School of Medicine<br />School of"
+                       "Informatics<br />"),
+    'stv': _("List of constituencies. e.g."
+             "<br/><br/>District A<br />"
+             "District B<br />District C"
+             "<br />"),
+}
+
+
+@lru_cache(maxsize=8)
+def _deps_widget_attrs(lang):
+    labels = dict((k, unicode(v)) for k, v in DEPS_LABELS.iteritems())
+    help_texts = dict((k, unicode(v)) for k, v in DEPS_HELP_TEXTS.iteritems())
+    return json.dumps(labels), json.dumps(help_texts)
+
+
+@lru_cache(maxsize=64)
+def election_module_choices(eligible_types):
+    return tuple(x for x in ELECTION_MODULES_CHOICES if x[0] in eligible_types)
+
 
 def election_form_formfield_cb(f, **kwargs):
     if f.name in ['voting_starts_at', 'voting_ends_at',
@@ -77,15 +140,42 @@ def setup_editable_fields(form, **value_overrides):
     FIELD_REQUIRED_FEATURES mapping which maps field names to model features.
     A field is editable only when all required model features resolve to True.
     """
-    for name, features in form.FIELD_REQUIRED_FEATURES.iteritems():
-        editable = all([form.instance.check_feature(f) for \
-                        f in features])
+    # only resolve features of fields actually present in the form
+    required_features = dict(
+        (name, features) for name, features in
+        form.FIELD_REQUIRED_FEATURES.iteritems() if name in form.fields)
+    features_map = form.instance.check_features_bulk(
+        chain.from_iterable(required_features.itervalues()))
+    for name, features in required_features.iteritems():
+        if not all(features_map[f] for f in features):
+            disable_field(form.fields[name], name, form, value_overrides)
+
+
+class ReadonlyWidgetMixin(object):
+    """
+    Resolves widget value from the form instance (or a value override)
+    instead of the submitted form data.
+    """
 
-        field = form.fields.get(name)
-        if not field:
-            continue
-        if not editable:
-            disable_field(field, name, form, value_overrides)
+    def value_from_datadict(self, data, files, name):
+        form, field_name, override = self._readonly_source
+        if override:
+            value = override(form)
+        else:
+            value = getattr(form.instance, field_name)
+        if hasattr(self, 'decompress'):
+            value = self.decompress(value)
+        return value
+
+
+@lru_cache(maxsize=None)
+def readonly_widget_class(widget_cls):
+    return type('Readonly%s' % widget_cls.__name__,
+                (ReadonlyWidgetMixin, widget_cls), {})
+
+
+def _readonly_clean(form, name):
+    return form.cleaned_data.get(name)
 
 
 def disable_field(field, name, form, value_overrides):
@@ -94,29 +184,12 @@ def disable_field(field, name, form, value_overrides):
     widget.attrs['disabled'] = True 
     field.disabled = True # Django 1.9 only
 
-    # creates a value_from_datadict which returns instance value instead
-    # of form data one
-    def _mk_readonly(widget, name, form, override=None):
-        def readonly_value_from_datadict(self, *args, **kwargs):
-            if override:
-                value = override(form)
-            else:
-                value = getattr(form.instance, name)
-            if hasattr(widget, 'decompress'):
-                value = widget.decompress(value)
-            return value
-        return types.MethodType(readonly_value_from_datadict, widget)
-
-    widget.__dict__['value_from_datadict'] = \
-        _mk_readonly(widget, name, form, value_overrides.get(name, None))
+    # swap widget class so that submitted data get ignored
+    if not isinstance(widget, ReadonlyWidgetMixin):
+        widget.__class__ = readonly_widget_class(widget.__class__)
+    widget._readonly_source = (form, name, value_overrides.get(name, None))
 
-
-    def _mk_dummy_clean(form, name):
-        def _dummy_clean(self, *args, **kwargs):
-            return self.cleaned_data.get(name)
-        return types.MethodType(_dummy_clean, form)
-
-    form.__dict__['clean_%s' % name] = _mk_dummy_clean(form, name)
+    form.__dict__['clean_%s' % name] = partial(_readonly_clean, form, name)
 
     if isinstance(widget, forms.CheckboxInput):
         widget.attrs['disabled'] = True
@@ -171,8 +244,7 @@ class ElectionForm(forms.ModelForm):
         else:
             lang = None
         super(ElectionForm, self).__init__(*args, **kwargs)
-        choices = getattr(settings, 'LANGUAGES', [])
-        choices = map(lambda x: (x[0], _(x[1])), choices)
+        choices = _LANG_CHOICES
         help_text = _("Set the language that will be used for email messages")
         self.fields['communication_language'] = forms.ChoiceField(label=
                                                     _("Communication language"),
@@ -194,16 +266,17 @@ class ElectionForm(forms.ModelForm):
         self._initial_data = {}
         election_owner = owner
         if self.instance and self.instance.pk:
-            self._initial_data = {}
-            for field in LOG_CHANGED_FIELDS:
-                self._initial_data[field] = self.initial[field]
+            # ModelForm initial is a plain dict built from the instance
+            self._initial_data = dict((field, self.initial[field]) for
+                                      field in LOG_CHANGED_FIELDS)
             self.creating = False
-            election_owner = self.instance.admins.filter()[0]
-            
+            election_owner = self.instance.admins.all().first() or owner
+
 
         # user-specific terms text
-        terms_options = resolve_terms_options(election_owner)
-        self.terms_text = parse_markdown_unsafe(_(terms_options.get('terms_text')))
+        terms_options = cached_terms_options(election_owner)
+        # markdown gets rendered only if the terms text is actually displayed
+        self.terms_text = lazy_terms_html(election_owner, get_language())
         self.fields['terms_consent'].help_text = self.terms_text
         # terms consent is required and only available during election creation
         # otherwise, enforce value to True and disable the checkbox input
@@ -222,27 +295,14 @@ class ElectionForm(forms.ModelForm):
 
         eligible_types = owner.eligible_election_types
         if not self.creating and self.instance:
-            eligible_types.add(self.instance.election_module)
-        eligible_types_choices = filter(lambda x: x[0] in eligible_types,
-                                        ELECTION_MODULES_CHOICES)
+            eligible_types = eligible_types | \
+                frozenset([self.instance.election_module])
+        eligible_types_choices = election_module_choices(eligible_types)
 
         self.fields['election_module'].choices = eligible_types_choices
-        deps_labels = {
-            'unicouncilsgr': unicode(_('Departments')),
-            'stv': unicode(_('Constituencies')),
-        }
-        deps_help_texts = {
-            'unicouncilsgr': unicode(_("University Schools. e.g."
-                                   "<br/><br/> School of Engineering <br />"
-                                   "School of Medicine<br />School of"
-                                   "Informatics<br />")),
-            'stv': unicode(_("List of constituencies. e.g."
-                                   "<br/><br/>District A<br />"
-                                   "District B<br />District C"
-                                   "<br />")),
-        }
-        self.fields['departments'].widget.attrs['data-labels'] = json.dumps(deps_labels)
-        self.fields['departments'].widget.attrs['data-help'] = json.dumps(deps_help_texts)
+        deps_labels, deps_help_texts = _deps_widget_attrs(get_language())
+        self.fields['departments'].widget.attrs['data-labels'] = deps_labels
+        self.fields['departments'].widget.attrs['data-help'] = deps_help_texts
         self.fields['departments'].required = False
 
         _module = self.data.get('election_module', None)
@@ -250,13 +310,16 @@ class ElectionForm(forms.ModelForm):
         if _module in ['unicouncilsgr']:
             self.fields['departments'].required = True
 
+        trustees_text = None
         if self.instance and self.instance.pk:
-            self.fields.get('trustees').initial = \
-                election_trustees_to_text(self.instance)
+            trustees_text = election_trustees_to_text(self.instance)
+            self.fields.get('trustees').initial = trustees_text
             self.fields.get('remote_mixes').initial = \
                 bool(self.instance.mix_key)
 
         def _clean_trustees(form):
+            if trustees_text is not None:
+                return trustees_text
             return election_trustees_to_text(form.instance)
         def _clean_remote_mixes(form):
             return bool(form.instance.mix_key)
@@ -278,16 +341,8 @@ class ElectionForm(forms.ModelForm):
         return data
 
     def clean_departments(self):
-        deps = self.cleaned_data.get('departments')
-        deps_arr = deps.split('\n')
-        cleaned_deps = []
-        for item in deps_arr:
-            item = item.strip()
-            item = item.lstrip()
-            if item:
-                cleaned_deps.append(item)
-        cleaned_deps = '\n'.join(cleaned_deps)
-        return cleaned_deps
+        deps = self.cleaned_data.get('departments') or ''
+        return '\n'.join(filter(None, (d.strip() for d in deps.splitlines())))
 
     def clean_voting_dates(self, starts, ends, extension):
         # WARN: skip live validation here. warn user during freeze instead.
@@ -310,16 +365,23 @@ class ElectionForm(forms.ModelForm):
 
     def clean_trustees(self):
         trustees = self.cleaned_data.get('trustees')
+        if not trustees:
+            self._parsed_trustees = []
+            return trustees
         try:
-            for tname, temail in extract_trustees(trustees):
-                validate_email(temail)
+            parsed = extract_trustees(trustees)
+            for tname, temail in parsed:
+                if not SIMPLE_EMAIL_RE.match(temail):
+                    validate_email(temail)
         except:
             raise forms.ValidationError(_("Invalid trustees format"))
+        self._parsed_trustees = parsed
         return trustees
 
     def log_changed_fields(self, instance):
+        changed = LOG_CHANGED_FIELDS_SET.intersection(self.changed_data)
         for field in LOG_CHANGED_FIELDS:
-            if field in self.changed_data:
+            if field in changed:
                 inital = self._initial_data[field]
                 newvalue = self.cleaned_data[field]
                 instance.logger.info("Field '%s' changed from %r to %r", field,
@@ -333,7 +395,11 @@ class ElectionForm(forms.ModelForm):
         else:
             self.instance.mix_key = None
         saved = super(ElectionForm, self).save(*args, **kwargs)
-        trustees = extract_trustees(self.cleaned_data.get('trustees'))
+        # reuse trustees parsed during validation, unless the field was
+        # not editable and clean_trustees got skipped
+        trustees = getattr(self, '_parsed_trustees', None)
+        if trustees is None:
+            trustees = extract_trustees(self.cleaned_data.get('trustees'))
         saved.institution = self.institution
         if saved.sms_api_enabled:
             saved.sms_data = self.owner.sms_data
@@ -367,6 +433,11 @@ class AnswerWidget(forms.TextInput):
         return mark_safe(html)
 
 
+@lru_cache(maxsize=64)
+def int_choices(start, stop):
+    return tuple((x, x) for x in range(start, stop))
+
+
 DEFAULT_ANSWERS_COUNT = 2
 MAX_QUESTIONS_LIMIT = getattr(settings, 'MAX_QUESTIONS_LIMIT', 1)
 
@@ -388,8 +459,7 @@ class QuestionBaseForm(forms.Form):
             self.fields['choice_type'].widget = forms.HiddenInput()
             self.fields['choice_type'].initial = 'choice'
 
-        answers = len(filter(lambda k: k.startswith("%s-answer_" %
-                                                self.prefix), self.data))
+        answers = self.answer_keys_count
         if not answers:
             answers = len(filter(lambda k: k.startswith("answer_") and not "indexes" in k,
                                  self.initial.keys()))
@@ -406,10 +476,23 @@ class QuestionBaseForm(forms.Form):
 
         self._answers = answers
 
+    @cached_property
+    def answer_keys_count(self):
+        prefix = "%s-answer_" % self.prefix
+        return sum(1 for k in self.data if k.startswith(prefix))
+
+    def _clean_answer_list(self):
+        answer_list = [value for key, value in self.cleaned_data.iteritems()
+                       if key.startswith('answer_')]
+        for answer in answer_list:
+            check_invalid_chars(answer)
+        if len(answer_list) > len(set(answer_list)):
+            raise forms.ValidationError(_("No duplicate choices allowed"))
+        return answer_list
+
     def clean_question(self):
         q = self.cleaned_data.get('question', '')
-        if '%' in q:
-            raise forms.ValidationError(INVALID_CHAR_MSG % "%")
+        check_invalid_chars(q)
         return q.replace(": ", ":\t")
 
 
@@ -423,11 +506,10 @@ class QuestionForm(QuestionBaseForm):
     def __init__(self, *args, **kwargs):
         super(QuestionForm, self).__init__(*args, **kwargs)
         answers = self._answers
-        max_choices = map(lambda x: (x,x), range(1, self.max_limit or answers+1))
-        min_choices = map(lambda x: (x,x), range(0, answers+1 if self.min_limit is None else self.min_limit))
+        max_choices = int_choices(1, self.max_limit or answers + 1)
 
         self.fields['max_answers'].choices = max_choices
-        self.fields['max_answers'].initial = min(map(lambda x:x[1], max_choices))
+        self.fields['max_answers'].initial = max_choices[0][1]
         self.fields['min_answers'].choices = max_choices
         self.fields['min_answers'].initial = 0
 
@@ -438,14 +520,7 @@ class QuestionForm(QuestionBaseForm):
         if min_answers > max_answers:
             raise forms.ValidationError(_("Max answers should be greater "
                                           "or equal to min answers"))
-        answer_list = []
-        for key in self.cleaned_data:
-            if key.startswith('answer_'):
-                if '%' in self.cleaned_data[key]:
-                    raise forms.ValidationError(INVALID_CHAR_MSG % "%")
-                answer_list.append(self.cleaned_data[key])
-        if len(answer_list) > len(set(answer_list)):
-            raise forms.ValidationError(_("No duplicate choices allowed"))
+        self._clean_answer_list()
         return self.cleaned_data
 
 
@@ -470,18 +545,19 @@ class ScoresForm(QuestionBaseForm):
     max_answers = forms.ChoiceField(label=_("Max answers"), required=True)
     def __init__(self, *args, **kwargs):
         super(ScoresForm, self).__init__(*args, **kwargs)
-        if type(self.data) != dict:
-            myDict = dict(self.data.iterlists())
+        scores_key = self.add_prefix('scores')
+        if hasattr(self.data, 'getlist'):
+            scores = self.data.getlist(scores_key)
         else:
-            myDict = self.data
+            scores = self.data.get(scores_key, [])
 
-        if 'form-0-scores' in myDict:
-            self._scores_len = len(myDict['form-0-scores'])
+        if scores:
+            self._scores_len = len(scores)
         elif 'scores' in self.initial:
             self._scores_len = len(self.initial['scores'])
         else:
             self._scores_len = SCORES_DEFAULT_LEN
-        max_choices = map(lambda x: (x,x), range(1, self._scores_len + 1))
+        max_choices = int_choices(1, self._scores_len + 1)
         self.fields['max_answers'].choices = max_choices
         self.fields['max_answers'].initial = self._scores_len
         self.fields['min_answers'].choices = max_choices
@@ -494,14 +570,7 @@ class ScoresForm(QuestionBaseForm):
         if (min_answers and max_answers) and min_answers > max_answers:
             raise forms.ValidationError(_("Max answers should be greater "
                                           "or equal to min answers"))
-        answer_list = []
-        for key in self.cleaned_data:
-            if key.startswith('answer_'):
-                if '%' in self.cleaned_data[key]:
-                    raise forms.ValidationError(INVALID_CHAR_MSG % "%")
-                answer_list.append(self.cleaned_data[key])
-        if len(answer_list) > len(set(answer_list)):
-            raise forms.ValidationError(_("No duplicate choices allowed"))
+        answer_list = self._clean_answer_list()
         if 'scores' in self.cleaned_data:
             if (len(answer_list) < max_answers):
                 m = _("Number of answers must be equal or bigger than max answers")
@@ -518,6 +587,31 @@ class RequiredFormset(BaseFormSet):
             except IndexError:
                 pass
 
+# candidate name/department pairs are packed using the ascii unit separator
+# while in transit between the widget and the form. Cleaned and stored answers
+# keep using json.
+CANDIDATE_VALUE_SEP = u'\x1f'
+# stands for a sub value missing from the POST, which json kept as null
+CANDIDATE_VALUE_NONE = u'\x00'
+CANDIDATE_VALUE_RESERVED_RE = re.compile(u'[\x00\x1f]')
+
+
+def pack_candidate_value(values):
+    # submitted values holding the markers themselves are packed as json,
+    # which escapes them, and get rejected when the form is cleaned
+    if any(v and CANDIDATE_VALUE_RESERVED_RE.search(v) for v in values):
+        return json.dumps(values)
+    return CANDIDATE_VALUE_SEP.join(
+        CANDIDATE_VALUE_NONE if v is None else v for v in values)
+
+
+def unpack_candidate_value(value):
+    if CANDIDATE_VALUE_SEP in value:
+        return [None if v == CANDIDATE_VALUE_NONE else v
+                for v in value.split(CANDIDATE_VALUE_SEP, 1)]
+    return json.loads(value)
+
+
 class CandidateWidget(MultiWidget):
 
     def __init__(self, *args, **kwargs):
@@ -530,7 +624,7 @@ class CandidateWidget(MultiWidget):
         if not value:
             return [None, None]
 
-        return json.loads(value)
+        return unpack_candidate_value(value)
 
     def format_output(self, rendered_widgets):
         """
@@ -553,7 +647,7 @@ class CandidateWidget(MultiWidget):
         datalist = [
             widget.value_from_datadict(data, files, name + '_%s' % i)
             for i, widget in enumerate(self.widgets)]
-        return json.dumps(datalist)
+        return pack_candidate_value(datalist)
 
 
 class StvForm(QuestionBaseForm):
@@ -570,11 +664,7 @@ class StvForm(QuestionBaseForm):
         super(StvForm, self).__init__(*args, **kwargs)
 
         self.fields.pop('question')
-        answers = len(
-            filter(
-                lambda k: k.startswith("%s-answer_" % self.prefix),
-                self.data)
-            ) / self.answer_widget_values_len
+        answers = self.answer_keys_count / self.answer_widget_values_len
 
         if not answers:
             answers = len(filter(lambda k: k.startswith("answer_"),
@@ -582,53 +672,49 @@ class StvForm(QuestionBaseForm):
         if answers == 0:
             answers = DEFAULT_ANSWERS_COUNT
 
+        # ballot settings fields come first, followed by the candidates
         self.fields.clear()
-        for ans in range(answers):
-            field_key = 'answer_%d' % ans
-            field_key1 = 'department_%d' % ans
-            _widget = self._make_candidate_widget(DEPARTMENT_CHOICES)
-            self.fields[field_key] = forms.CharField(max_length=600,
-                                              required=True,
-                                              widget=_widget,
-                                              label=('Candidate'))
-
-        elig_help_text = _("https://en.wikipedia.org/wiki/Droop_quota")
-        label_text = _("Droop quota")
-        ordered_dict_prepend(self.fields, 'droop_quota',
-                             forms.BooleanField(
-                                 required=False,
-                                 label=label_text,
-                                 initial=True,
-                                 help_text=elig_help_text))
-        self.fields['droop_quota'].widget.attrs['readonly'] = True
-        self.fields['droop_quota'].widget.attrs['disabled'] = True
 
-        widget=forms.TextInput(attrs={'hidden': 'True'})
-        dep_lim_help_text = _("maximum number of elected from the same constituency")
-        dep_lim_label = _("Constituency limit")
-        ordered_dict_prepend(self.fields, 'department_limit',
-                             forms.CharField(
-                                 help_text=dep_lim_help_text,
-                                 label=dep_lim_label,
-                                 widget=widget,
-                                 required=False))
+        elig_help_text = _("set the eligibles count of the election")
+        label_text = _("Eligibles count")
+        self.fields['eligibles'] = forms.CharField(label=label_text,
+                                                   help_text=elig_help_text)
 
         widget=forms.CheckboxInput()
         limit_help_text = _("enable limiting the elections from the same constituency")
         limit_label = _("Limit elected per constituency")
-        ordered_dict_prepend(self.fields, 'has_department_limit',
-                             forms.BooleanField(
+        self.fields['has_department_limit'] = forms.BooleanField(
                                  widget=widget,
                                  help_text=limit_help_text,
                                  label = limit_label,
-                                 required=False))
+                                 required=False)
 
-        elig_help_text = _("set the eligibles count of the election")
-        label_text = _("Eligibles count")
-        ordered_dict_prepend(self.fields, 'eligibles',
-                             forms.CharField(
+        widget=forms.TextInput(attrs={'hidden': 'True'})
+        dep_lim_help_text = _("maximum number of elected from the same constituency")
+        dep_lim_label = _("Constituency limit")
+        self.fields['department_limit'] = forms.CharField(
+                                 help_text=dep_lim_help_text,
+                                 label=dep_lim_label,
+                                 widget=widget,
+                                 required=False)
+
+        droop_help_text = _("https://en.wikipedia.org/wiki/Droop_quota")
+        label_text = _("Droop quota")
+        self.fields['droop_quota'] = forms.BooleanField(
+                                 required=False,
                                  label=label_text,
-                                 help_text=elig_help_text))
+                                 initial=True,
+                                 help_text=droop_help_text)
+        self.fields['droop_quota'].widget.attrs['readonly'] = True
+        self.fields['droop_quota'].widget.attrs['disabled'] = True
+
+        for ans in range(answers):
+            field_key = 'answer_%d' % ans
+            _widget = self._make_candidate_widget(DEPARTMENT_CHOICES)
+            self.fields[field_key] = forms.CharField(max_length=600,
+                                              required=True,
+                                              widget=_widget,
+                                              label=('Candidate'))
 
 
     min_answers = None
@@ -639,22 +725,22 @@ class StvForm(QuestionBaseForm):
 
     def _clean_answer(self, answer):
         from django.forms.util import ErrorList
-        answer_lst = json.loads(answer)
-        if '%' in answer_lst[0]:
-            raise forms.ValidationError(INVALID_CHAR_MSG % "%")
+        answer_lst = unpack_candidate_value(answer)
         if not answer_lst[0]:
             message = _("This field is required.")
             self._errors['answer_0'] = ErrorList([message])
             return None, json.dumps([])
+        for value in answer_lst:
+            match = value and CANDIDATE_VALUE_RESERVED_RE.search(value)
+            if match:
+                raise forms.ValidationError(
+                    INVALID_CHAR_MSG % ('\\x%02x' % ord(match.group())))
+        check_invalid_chars(answer_lst[0])
         answer_lst[0] = answer_lst[0].strip()
         return answer_lst[0], json.dumps(answer_lst)
 
     def clean(self):
-        answers = len(
-            filter(
-                lambda k: k.startswith(
-                    "%s-answer_" % self.prefix), self.data)
-            ) / self.answer_widget_values_len
+        answers = self.answer_keys_count / self.answer_widget_values_len
 
         #list used for checking duplicate candidates
         candidates_list = []
@@ -741,22 +827,29 @@ class PreferencesForm(StvForm):
         return AnswerWidget(attrs={'class': 'answer_input'})
 
     def _clean_answer(self, answer):
-        if '%' in answer:
-            raise forms.ValidationError(INVALID_CHAR_MSG % "%")
+        check_invalid_chars(answer)
         return answer, answer
 
 
+PASSWORD_MAX_LENGTH = 100
+LOGIN_FAILED_CACHE_TIMEOUT = getattr(settings,
+                                     'ZEUS_LOGIN_FAILED_CACHE_TIMEOUT', 60)
+
+
 class LoginForm(forms.Form):
     username = forms.CharField(label=_('Username'),
                                max_length=50)
     password = forms.CharField(label=_('Password'),
                                widget=forms.PasswordInput(),
-                               max_length=100)
+                               max_length=PASSWORD_MAX_LENGTH)
 
     def clean(self):
         self._user_cache = None
         username = self.cleaned_data.get('username')
         password = self.cleaned_data.get('password')
+        if not username or not password:
+            raise forms.ValidationError(_("Invalid username or password"))
+
         try:
             user = User.objects.get(user_id=username)
         except User.DoesNotExist:
@@ -765,13 +858,61 @@ class LoginForm(forms.Form):
         if user.is_disabled:
             raise forms.ValidationError(_("Your account is disabled"))
 
-        if check_password(password, user.info['password']):
+        # identical failed attempts are rejected without rehashing; the key
+        # covers the stored hash so a password change drops old failures
+        stored_password = user.info['password']
+        failed_key = 'login-failed:%s' % salted_hmac(
+            'zeus.forms.LoginForm',
+            (u'%s\0%s\0%s' % (username, password, stored_password)).encode(
+                'utf8')).hexdigest()
+        if cache.get(failed_key):
+            raise forms.ValidationError(_("Invalid username or password"))
+
+        if check_password(password, stored_password):
             self._user_cache = user
             return self.cleaned_data
         else:
+            cache.set(failed_key, True, LOGIN_FAILED_CACHE_TIMEOUT)
             raise forms.ValidationError(_("Invalid username or password"))
 
 
+def poll_is_linked_leaf(poll):
+    # same as Poll.is_linked_leaf for stored polls, which always have a uuid,
+    # without the linked polls count queries
+    return bool(poll.linked_ref)
+
+
+URL_VALIDATOR = URLValidator()
+
+OAUTH2_URL_FIELDS = ('oauth2_code_url', 'oauth2_exchange_url',
+                     'oauth2_confirmation_url')
+OAUTH2_FIELDS = ('oauth2_type', 'oauth2_client_type', 'oauth2_client_id',
+                 'oauth2_client_secret') + OAUTH2_URL_FIELDS
+JWT_FIELDS = ('jwt_issuer', 'jwt_public_key')
+
+OAUTH2_CLIENT_TYPES = (
+    ('public', 'public'),
+    ('confidential', 'confidential'),
+)
+
+OAUTH2_TYPES = (
+    ('google', 'google'),
+    ('facebook', 'facfebook'),
+    ('other', 'other')
+)
+
+OAUTH2_HIDDEN_URL_FIELDS = (
+    ('google_code_url', "https://accounts.google.com/o/oauth2/auth"),
+    ('google_exchange_url', "https://accounts.google.com/o/oauth2/token"),
+    ('google_confirmation_url',
+     "https://www.googleapis.com/oauth2/v1/userinfo"),
+    ('facebook_code_url', "https://www.facebook.com/dialog/oauth"),
+    ('facebook_exchange_url',
+     "https://graph.facebook.com/oauth/access_token"),
+    ('facebook_confirmation_url', "https://graph.facebook.com/v2.2/me"),
+)
+
+
 class PollForm(forms.ModelForm):
 
     FIELD_REQUIRED_FEATURES = {
@@ -800,29 +941,25 @@ class PollForm(forms.ModelForm):
         super(PollForm, self).__init__(*args, **kwargs)
         if 'linked_ref' in self.initial and self.initial['linked_ref'] is None:
             self.initial['linked_ref'] = ''
-        CHOICES = (
-            ('public', 'public'),
-            ('confidential', 'confidential'),
-        )
-
-        TYPES = (
-            ('google', 'google'),
-            ('facebook', 'facfebook'),
-            ('other', 'other')
-        )
-
-
         ordered_dict_prepend(self.fields, 'jwt_file',
                              forms.FileField(
                                  label="JWT public keyfile",
                                  required=False))
 
+        # election polls are fetched once and reused during validation. Only
+        # the columns needed for linking and name checks are loaded.
+        self._polls_cache = list(self.election.polls.only(
+            'pk', 'uuid', 'name', 'linked_ref', 'election'))
+        self._polls_by_uuid = dict((p.uuid, p) for p in self._polls_cache)
+
         if self.instance.is_linked_root:
             del self.fields['linked_ref']
         else:
             linked_choices = [["", ""]]
-            for p in self.election.polls.filter().exclude(pk=self.instance.pk):
-                if not p.is_linked_leaf:
+            for p in self._polls_cache:
+                if p.pk == self.instance.pk and p.pk is not None:
+                    continue
+                if not poll_is_linked_leaf(p):
                     linked_choices.append((p.uuid, p.name))
             self.fields['linked_ref'].choices = linked_choices
 
@@ -830,33 +967,13 @@ class PollForm(forms.ModelForm):
         self.fields['jwt_public_key'] = forms.CharField(required=False,
                                                         widget=forms.Textarea)
         self.fields['oauth2_type'] = forms.ChoiceField(required=False,
-                                                       choices=TYPES)
+                                                       choices=OAUTH2_TYPES)
         self.fields['oauth2_client_type'] = forms.ChoiceField(required=False,
-                                                              choices=CHOICES)
-        self.fields['google_code_url'] = forms.CharField(
-                                    widget=HiddenInput,
-                                    initial="https://accounts.google.com/o/oauth2/auth",
-                                    required=False)
-        self.fields['google_exchange_url'] = forms.CharField(
-                                    widget=HiddenInput,
-                                    initial="https://accounts.google.com/o/oauth2/token",
-                                    required=False)
-        self.fields['google_confirmation_url'] = forms.CharField(
-                                    widget=HiddenInput,
-                                    initial="https://www.googleapis.com/oauth2/v1/userinfo",
-                                    required=False)
-        self.fields['facebook_code_url'] = forms.CharField(
-                                    widget=HiddenInput,
-                                    initial="https://www.facebook.com/dialog/oauth",
-                                    required=False)
-        self.fields['facebook_exchange_url'] = forms.CharField(
-                                    widget=HiddenInput,
-                                    initial="https://graph.facebook.com/oauth/access_token",
-                                    required=False)
-        self.fields['facebook_confirmation_url'] = forms.CharField(
-                                    widget=HiddenInput,
-                                    initial="https://graph.facebook.com/v2.2/me",
-                                    required=False)
+                                                              choices=OAUTH2_CLIENT_TYPES)
+        for name, initial in OAUTH2_HIDDEN_URL_FIELDS:
+            self.fields[name] = forms.CharField(widget=HiddenInput,
+                                                initial=initial,
+                                                required=False)
 
         self.fields['forum_starts_at'].help_text = None
         self.fields['forum_ends_at'].help_text = _("Voting starts at %s") % self.election.voting_ends_at
@@ -865,10 +982,15 @@ class PollForm(forms.ModelForm):
         shib_data = None
         if self.initial is not None:
             shib_data = self.initial.get('shibboleth_constraints', None)
-            if isinstance(shib_data, basestring):
-                shib_data = json.loads(shib)
-            if shib_data is not None and isinstance(shib_data, dict):
+            # serialize dict constraints for display; string values are
+            # already serialized and only need decoding for profile lookup
+            if isinstance(shib_data, dict):
                 self.initial['shibboleth_constraints'] = json.dumps(shib_data)
+            elif isinstance(shib_data, basestring):
+                try:
+                    shib_data = json.loads(shib_data)
+                except ValueError:
+                    shib_data = None
             if not self.instance or not self.instance.pk:
                 self.initial['forum_ends_at'] = self.election.voting_starts_at
                 self.initial['forum_starts_at'] = self.initial['forum_ends_at'] - timedelta(days=2)
@@ -894,7 +1016,7 @@ class PollForm(forms.ModelForm):
             del self.fields['taxisnet_auth']
 
         if profiles:
-            for key, data in profiles.items():
+            for key, data in profiles.iteritems():
                 field_key = 'shibprofile{}'.format(key)
                 fields_key = '{}_auth'.format(field_key)
                 if shib_data and shib_data.get('profile', None) == key:
@@ -911,36 +1033,34 @@ class PollForm(forms.ModelForm):
                 auth_checks.append(fields_key)
                 auth_fields.append(field_key)
 
+        auth_fields_set = frozenset(auth_fields)
+        auth_checks_set = frozenset(auth_checks)
         for name, field in self.fields.items():
-            parts = name.split("_")
-            if not parts[0] in auth_fields:
+            key = name.split("_", 1)[0]
+            if key not in auth_fields_set:
                 continue
-            is_check = name in auth_checks
-            key = parts[0]
-
-            if key in auth_fields:
-                self.fieldsets['auth'][2].append(name)
-                self.fieldset_fields.append(field)
-                setattr(field, 'field_attrs', '')
-                attrs = "data-auth={}".format(key)
-                if is_check:
-                    attrs += " data-auth-toggle=true"
-                    field.widget.attrs['field_class'] = 'fieldset-auth'
-                    field.help_text = field.help_text or '&nbsp;&nbsp;'
-                else:
-                    attrs += " data-auth-option={}".format(key)
-                    field.widget.attrs['field_class'] = \
-                        'auth-option-field {}'.format(key)
-                field.field_attrs = attrs
+            is_check = name in auth_checks_set
+
+            self.fieldsets['auth'][2].append(name)
+            self.fieldset_fields.append(field)
+            setattr(field, 'field_attrs', '')
+            attrs = "data-auth={}".format(key)
+            if is_check:
+                attrs += " data-auth-toggle=true"
+                field.widget.attrs['field_class'] = 'fieldset-auth'
+                field.help_text = field.help_text or '&nbsp;&nbsp;'
+            else:
+                attrs += " data-auth-option={}".format(key)
+                field.widget.attrs['field_class'] = \
+                    'auth-option-field {}'.format(key)
+            field.field_attrs = attrs
 
+        # auth checks go first, in reverse declaration order
         keyOrder = self.fieldsets['auth'][2]
-        fieldsKeys = self.fields.keys()
-        for field in auth_checks:
-            prev_index = keyOrder.index(field)
-            item = keyOrder.pop(prev_index)
-            keyOrder.insert(0, item)
-            if field == 'jwt_auth':
-                self.fields[field].widget.attrs['field_class'] = 'clearfix last'
+        keyOrder[:] = [f for f in reversed(auth_checks) if f in keyOrder] + \
+                      [f for f in keyOrder if f not in auth_checks_set]
+        if 'jwt_auth' in self.fields:
+            self.fields['jwt_auth'].widget.attrs['field_class'] = 'clearfix last'
 
         if self.admin and not self.admin.can_enable_forum:
             if not self.instance.forum_enabled:
@@ -980,45 +1100,49 @@ class PollForm(forms.ModelForm):
         if not ref:
             ref = None
         if ref:
-            if not ref in self.election.polls.filter().values_list('uuid', flat=True):
+            p = self._polls_by_uuid.get(ref)
+            if p is None or poll_is_linked_leaf(p):
                 raise forms.ValidationError(_("Invalid poll"))
-            else:
-                p = self.election.polls.get(uuid=ref)
-                if p.is_linked_leaf:
-                    raise forms.ValidationError(_("Invalid poll"))
 
         return ref
 
     def clean_forum_starts_at(self):
         # forum start date should be set on a date after current date.
-        enabled = self.cleaned_data.get('forum_enabled')
-        starts_at = self.cleaned_data.get('forum_starts_at')
-        if enabled and not starts_at:
+        cd = self.cleaned_data
+        enabled = cd.get('forum_enabled')
+        starts_at = cd.get('forum_starts_at')
+        if not enabled:
+            return starts_at
+        if not starts_at:
             raise forms.ValidationError(_("This field is required."))
-        voting_starts = self.election.voting_starts_at
-        if not self.election.trial and enabled and starts_at >= voting_starts:
+        election = self.election
+        if not election.trial and starts_at >= election.voting_starts_at:
             raise forms.ValidationError(_("Forum should start before voting."))
         return starts_at
 
     def clean_forum_ends_at(self):
         # forum end date should be set if forum is enabled and should be set to
         # a date after current date and after forum start date
-        enabled = self.cleaned_data.get('forum_enabled')
-        starts_at = self.cleaned_data.get('forum_starts_at')
-        ends_at = self.cleaned_data.get('forum_ends_at')
-        voting_starts = self.election.voting_starts_at
-        if enabled and not ends_at:
+        cd = self.cleaned_data
+        enabled = cd.get('forum_enabled')
+        starts_at = cd.get('forum_starts_at')
+        ends_at = cd.get('forum_ends_at')
+        if not enabled:
+            return ends_at
+        if not ends_at:
             raise forms.ValidationError(_("This field is required."))
-        if all([enabled, ends_at, starts_at]) and (ends_at <= starts_at):
+        if starts_at and (ends_at <= starts_at):
             raise forms.ValidationError(_("Invalid forum access end date"))
-        if enabled and not self.election.trial and (ends_at > voting_starts):
+        election = self.election
+        if not election.trial and (ends_at > election.voting_starts_at):
             raise forms.ValidationError(_("Forum should end before voting."))
 
         return ends_at
 
     def clean_forum_description(self):
-        desc = self.cleaned_data.get('forum_description') or ''
-        enabled = self.cleaned_data.get('forum_enabled')
+        cd = self.cleaned_data
+        desc = cd.get('forum_description') or ''
+        enabled = cd.get('forum_enabled')
 
         desc = desc.strip()
         if enabled and not desc:
@@ -1026,8 +1150,9 @@ class PollForm(forms.ModelForm):
         return desc
 
     def clean_forum_extended_until(self):
-        date = self.cleaned_data.get('forum_extended_until')
-        enabled = self.cleaned_data.get('forum_enabled')
+        cd = self.cleaned_data
+        date = cd.get('forum_extended_until')
+        enabled = cd.get('forum_enabled')
         forum_ends_at = self.instance.forum_ends_at
 
         if enabled and date and (date <= forum_ends_at):
@@ -1049,44 +1174,36 @@ class PollForm(forms.ModelForm):
         super(PollForm, self).clean()
 
         data = self.cleaned_data
-        election_polls = self.election.polls.all()
+        poll_names = set(p.name for p in self._polls_cache)
 
-        enabled = self.cleaned_data.get('forum_enabled')
-        linked_ref = self.cleaned_data.get('linked_ref')
+        enabled = data.get('forum_enabled')
+        linked_ref = data.get('linked_ref')
         if enabled and linked_ref:
             msg = [_("Forum cannot be enabled for linked polls")]
             self._errors["forum_enabled"] = msg
             self._errors["linked_ref"] = msg
 
-        for poll in election_polls:
-            if (data.get('name') == poll.name and
-                    ((not self.instance.pk ) or
-                    (self.instance.pk and self.instance.name!=data.get('name')))):
-                message = _("Duplicate poll names are not allowed")
-                raise forms.ValidationError(message)
+        name = data.get('name')
+        if name in poll_names and \
+                (not self.instance.pk or self.instance.name != name):
+            message = _("Duplicate poll names are not allowed")
+            raise forms.ValidationError(message)
         if self.election.feature_frozen and\
-            (self.cleaned_data['name'] != self.instance.name):
+            (data['name'] != self.instance.name):
                 raise forms.ValidationError(_("Poll name cannot be changed\
                                                after freeze"))
 
-        oauth2_field_names = ['type', 'client_type', 'client_id', 'client_secret',
-                       'code_url', 'exchange_url', 'confirmation_url']
-        oauth2_field_names = ['oauth2_' + x for x in oauth2_field_names]
-        jwt_field_names = ['jwt_issuer', 'jwt_public_key']
-        url_validate = URLValidator()
         if data['oauth2_thirdparty']:
-            for field_name in oauth2_field_names:
+            for field_name in OAUTH2_FIELDS:
                 if not data[field_name]:
                     self._errors[field_name] = _('This field is required.'),
-            url_types = ['code', 'exchange', 'confirmation']
-            for url_type in url_types:
+            for field_name in OAUTH2_URL_FIELDS:
                 try:
-                    url_validate(data['oauth2_{}_url'.format(url_type)])
+                    URL_VALIDATOR(data[field_name])
                 except ValidationError:
-                    self._errors['oauth2_{}_url'.format(url_type)] =\
-                        ((_("This URL is invalid"),))
+                    self._errors[field_name] = ((_("This URL is invalid"),))
         else:
-            for field_name in oauth2_field_names:
+            for field_name in OAUTH2_FIELDS:
                data[field_name] = ''
 
         shibboleth_field_names = []
@@ -1095,19 +1212,19 @@ class PollForm(forms.ModelForm):
                 if not data[field_name]:
                     self._errors[field_name] = _('This field is required.'),
 
-        for _key, item in self.shib_profiles.items():
-            key = 'shibprofile{}_auth'.format(_key)
+        for profile, item in self.shib_profiles.iteritems():
+            key = 'shibprofile{}_auth'.format(profile)
             if data[key]:
                 data['shibboleth_auth'] = True
                 data['shibboleth_constraints'] = item.get('data')
-                data['shibboleth_constraints']['profile'] = _key
+                data['shibboleth_constraints']['profile'] = profile
 
         if data['jwt_auth']:
-            for field_name in jwt_field_names:
+            for field_name in JWT_FIELDS:
                 if not data[field_name]:
                     self._errors[field_name] = _('This field is required.'),
         else:
-            for field_name in jwt_field_names:
+            for field_name in JWT_FIELDS:
                 data[field_name] = ''
 
         return data
@@ -1140,16 +1257,15 @@ class PollFormSet(BaseModelFormSet):
 
     def clean(self):
         forms_data = self.cleaned_data
+        existing_names = set(self.election.polls.values_list('name',
+                                                             flat=True))
         form_poll_names = []
         for form_data in forms_data:
-            form_poll_names.append(form_data['name'])
             poll_name = form_data['name']
-            e = Election.objects.get(id=self.election.id)
-            election_polls = e.polls.all()
-            for poll in election_polls:
-                if poll_name == poll.name:
-                    message = _("Duplicate poll names are not allowed")
-                    raise forms.ValidationError(message)
+            form_poll_names.append(poll_name)
+            if poll_name in existing_names:
+                message = _("Duplicate poll names are not allowed")
+                raise forms.ValidationError(message)
         if len(form_poll_names) > len(set(form_poll_names)):
             message = _("Duplicate poll names are not allowed")
             raise forms.ValidationError(message)
@@ -1204,10 +1320,10 @@ class EmailVotersForm(forms.Form):
             self.fields['notify_once'].widget = forms.HiddenInput()
             self.fields['notify_once'].initial = False
         else:
-            choices = copy.copy(CONTACT_CHOICES)
-            choices[1] = list(choices[1])
-            choices[1][1] = "%s (%s)" % (unicode(choices[1][1]), _("%d deliveries available") % election.sms_data.left)
-            self.fields['contact_method'].choices = choices
+            sms_value, sms_label = CONTACT_CHOICES[1]
+            sms_label = u"%s (%s)" % (unicode(sms_label), _("%d deliveries available") % election.sms_data.left)
+            self.fields['contact_method'].choices = [
+                CONTACT_CHOICES[0], (sms_value, sms_label), CONTACT_CHOICES[2]]
 
     def clean(self):
         super(EmailVotersForm, self).clean()
@@ -1219,8 +1335,12 @@ class EmailVotersForm(forms.Form):
 
 
 class ChangePasswordForm(forms.Form):
-    password = forms.CharField(label=_('Current password'), widget=forms.PasswordInput)
-    new_password = forms.CharField(label=_('New password'), widget=forms.PasswordInput)
+    password = forms.CharField(label=_('Current password'),
+                               widget=forms.PasswordInput,
+                               max_length=PASSWORD_MAX_LENGTH)
+    new_password = forms.CharField(label=_('New password'),
+                                   widget=forms.PasswordInput,
+                                   max_length=PASSWORD_MAX_LENGTH)
     new_password_confirm = forms.CharField(label=_('New password confirm'), widget=forms.PasswordInput)
 
     def __init__(self, user, *args, **kwargs):
@@ -1235,8 +1355,9 @@ class ChangePasswordForm(forms.Form):
 
     def clean(self):
         cl = super(ChangePasswordForm, self).clean()
-        pwd = self.cleaned_data['password'].strip()
-        if not check_password(pwd, self.user.info['password']):
+        pwd = (self.cleaned_data.get('password') or '').strip()
+        # skip the expensive hasher for missing or over-long input
+        if not pwd or not check_password(pwd, self.user.info['password']):
             raise forms.ValidationError(_('Invalid password'))
         if not self.cleaned_data.get('new_password') == \
            self.cleaned_data.get('new_password_confirm'):
@@ -1263,30 +1384,26 @@ class VoterLoginForm(forms.Form):
         if not login_id:
             raise forms.ValidationError(invalid_login_id_error)
 
-        matches = filter(bool, self.validation.findall(login_id))
-        if len(matches):
-            login_id = matches[0]
-        else:
-            matches = filter(bool, self.validation_digits.findall(login_id))
-            if len(matches):
-                login_id = matches[0]
+        match = self.validation.search(login_id) or \
+            self.validation_digits.search(login_id)
+        if match:
+            login_id = match.group(0)
 
         try:
             poll_id, secret = Voter.extract_login_code(login_id)
         except ValueError:
             raise forms.ValidationError(invalid_login_id_error)
 
-        poll = None
+        # resolve voter and poll in one query, the poll is only looked up on
+        # its own to report the appropriate error
+        voters = Voter.objects.select_related('poll__election')
         try:
-            poll = Poll.objects.get(pk=poll_id)
-        except Poll.DoesNotExist:
-            raise forms.ValidationError(invalid_login_id_error)
+            self._voter = voters.get(poll__pk=poll_id, voter_password=secret)
         except ValueError:
             raise forms.ValidationError(invalid_login_id_error)
-
-        try:
-            self._voter = poll.voters.get(voter_password=secret)
         except Voter.DoesNotExist:
+            if not Poll.objects.filter(pk=poll_id).exists():
+                raise forms.ValidationError(invalid_login_id_error)
             raise forms.ValidationError(_("Invalid email or password"))
 
         return cleaned_data
@@ -1300,13 +1417,15 @@ class STVBallotForm(forms.Form):
         choices = [('', '')]
         for i, c in enumerate(candidates):
             choices.append((str(i), c))
-        for i, c in enumerate(candidates):
-            self.fields['choice_%d' % (i + 1)] = forms.ChoiceField(choices=choices, initial='', required=False, label=_("Ballot choice %s") % str(i + 1))
+        self._choice_keys = ['choice_%d' % (i + 1) for i in
+                             range(len(candidates))]
+        for i, key in enumerate(self._choice_keys):
+            self.fields[key] = forms.ChoiceField(choices=choices, initial='', required=False, label=_("Ballot choice %s") % str(i + 1))
 
     def get_choices(self, serial):
         vote = {'votes': [], "ballotSerialNumber": serial}
-        for i, c in enumerate(self.candidates):
-            val = self.cleaned_data.get('choice_%d' % (i + 1), '')
+        for i, key in enumerate(self._choice_keys):
+            val = self.cleaned_data.get(key, '')
             if not val:
                 break
             vote['votes'].append({'rank': (i + 1), "candidateTmpId": val})
@@ -1315,18 +1434,16 @@ class STVBallotForm(forms.Form):
     def clean(self):
         data = self.cleaned_data
         empty = False
-        choices = []
-        for i, c in enumerate(self.candidates):
-            val = self.cleaned_data.get('choice_%d' % (i + 1), '')
-            if val == "":
+        seen = set()
+        for key in self._choice_keys:
+            val = data.get(key, '')
+            if not val:
                 empty = True
-            if val and empty:
+                continue
+            # no gaps in ranking, no candidate ranked twice
+            if empty or val in seen:
                 raise ValidationError(_("Invalid ballot"))
-            if val:
-                choices.append(val)
-
-        if len(choices) != len(set(choices)):
-            raise ValidationError(_("Invalid ballot"))
+            seen.add(val)
         return data
 
 
@@ -1337,6 +1454,18 @@ FirstName, LastName, FatherName, SchoolB<br />
 
 limit_choices = map(lambda x: (x, str(x)), range(2))
 eligibles_choices = map(lambda x: (x, str(x)), range(1, 20))
+# equivalent to the "%d/%m/%Y %H:%M" strptime format
+STV_DATE_RE = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4}) (\d{1,2}):(\d{1,2})\Z")
+
+
+def parse_stv_date(value):
+    match = STV_DATE_RE.match(value)
+    if not match:
+        raise ValueError("Invalid date format")
+    day, month, year, hour, minute = map(int, match.groups())
+    return datetime(year, month, day, hour, minute)
+
+
 class STVElectionForm(forms.Form):
     name = forms.CharField(label=_("Election name"), required=True)
     voting_starts = forms.CharField(label=_("Voting start date"), required=True, help_text=_("e.g. 25/01/2015 07:00"))
@@ -1355,8 +1484,8 @@ class STVElectionForm(forms.Form):
         d = self.cleaned_data.get('voting_starts') or ''
         d = d.strip()
         try:
-            datetime.strptime(d, "%d/%m/%Y %H:%M")
-        except:
+            parse_stv_date(d)
+        except ValueError:
             raise ValidationError(_("Invalid date format"))
         return d
 
@@ -1364,8 +1493,8 @@ class STVElectionForm(forms.Form):
         d = self.cleaned_data.get('voting_ends') or ''
         d = d.strip()
         try:
-            datetime.strptime(d, "%d/%m/%Y %H:%M")
-        except:
+            parse_stv_date(d)
+        except ValueError:
             raise ValidationError(_("Invalid date format"))
         return d
 
@@ -1397,19 +1526,15 @@ class STVElectionForm(forms.Form):
         ret["votingEnds"] = data.get('voting_ends')
         ret["institution"] = data.get('institution')
         ret["numOfEligibles"] = int(data.get('eligibles_count'))
-        cands = self.get_candidates()
-        schools = defaultdict(lambda: [])
-        for i, c in enumerate(cands):
-            name, school = c.split(":")
-            name, surname, fathername = name.split(" ")
+        schools = defaultdict(list)
+        for i, c in enumerate(data.get('candidates')):
+            name, surname, fathername, school = \
+                [x.strip().replace(" ", "-") for x in c.split(",")]
             entry = {'lastName': surname, 'fatherName': fathername,
                      'candidateTmpId': i, 'firstName': name}
             schools[school].append(entry)
 
-        _schools = []
-        for school, cands in schools.iteritems():
-            _schools.append({'candidates': cands, 'Name': school})
-
-        ret['schools'] = _schools
+        ret['schools'] = [{'candidates': cands, 'Name': school}
+                          for school, cands in schools.iteritems()]
         ret['ballots'] = []
         return ret
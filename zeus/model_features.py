@@ -54,6 +54,12 @@ class FeaturesMixin(object):
     def check_features_verbose(self, *features):
         return [(f, self.check_feature(f)) for f in features]
 
+    def check_features_bulk(self, features):
+        """
+        Resolve each distinct feature once, returning a feature -> bool map.
+        """
+        return dict((f, self.check_feature(f)) for f in set(features))
+
     def list_features(self):
         return FEATURES_REGISTRY.get(self.features_ns).keys()
 
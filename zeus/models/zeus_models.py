@@ -1,11 +1,13 @@
 from django.db import models
 from django.conf import settings
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 
 from helios import models as helios_models
+from heliosauth.models import User
 
 from zeus.core import get_random_int
+from zeus.utils import bump_terms_cache, bump_admin_home_count
 
 
 class Institution(models.Model):
@@ -91,3 +93,47 @@ def generate_authcode(length=12):
         m = "Invalid authcode length"
         raise AssertionError(m)
     return authcode
+
+
+@receiver(post_save, sender=User)
+def _user_saved_bump_terms(sender, instance, **kwargs):
+    bump_terms_cache(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.user_groups.through)
+def _user_groups_changed_bump_terms(sender, instance, action, reverse,
+                                    pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            bump_terms_cache(instance.pk)
+        return
+    # a group's users are cleared with no pk_set, remember them first
+    if action == 'pre_clear':
+        instance._terms_cleared_users = list(
+            instance.user_set.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_terms_cleared_users', ())
+    elif action not in ('post_add', 'post_remove'):
+        return
+    for user_pk in pk_set or ():
+        bump_terms_cache(user_pk)
+
+
+@receiver(m2m_changed, sender=helios_models.Election.admins.through)
+def _election_admins_changed_bump_count(sender, instance, action, reverse,
+                                        pk_set, **kwargs):
+    if reverse:
+        if action.startswith('post_'):
+            bump_admin_home_count([instance.pk])
+        return
+    # an election's admins are cleared with no pk_set, remember them first
+    if action == 'pre_clear':
+        instance._count_cleared_admins = list(
+            instance.admins.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_count_cleared_admins', ())
+    elif action not in ('post_add', 'post_remove'):
+        return
+    bump_admin_home_count(pk_set or ())
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from zeus.utils import defusedcsv as csv
 from functools import partial
+from itertools import chain
 
 from cStringIO import StringIO
 from collections import defaultdict
@@ -450,10 +451,37 @@ def csv_from_score_polls(election, polls, lang, outfile=None):
             return None
 
 
+def annotate_report_counts(elections):
+    """
+    Attach nr_polls, nr_voters and nr_voters_voted to each election of
+    the queryset as correlated subqueries, so that report rows need no
+    extra queries. Voted voters follow VoterQuerySet.cast().
+    """
+    from helios.models import Election, Poll, Voter, CastVote
+
+    params = {
+        'election': Election._meta.db_table,
+        'poll': Poll._meta.db_table,
+        'voter': Voter._meta.db_table,
+        'castvote': CastVote._meta.db_table,
+    }
+    voters = ("SELECT COUNT(*) FROM %(voter)s "
+              "INNER JOIN %(poll)s ON %(voter)s.poll_id = %(poll)s.id "
+              "WHERE %(poll)s.election_id = %(election)s.id" % params)
+    voted = (" AND %(voter)s.excluded_at IS NULL AND EXISTS "
+             "(SELECT 1 FROM %(castvote)s "
+             "WHERE %(castvote)s.voter_id = %(voter)s.id)" % params)
+    return elections.extra(select=OrderedDict([
+        ('nr_polls', "SELECT COUNT(*) FROM %(poll)s "
+                     "WHERE %(poll)s.election_id = %(election)s.id" % params),
+        ('nr_voters', voters),
+        ('nr_voters_voted', voters + voted),
+    ]))
+
+
 class ElectionsReport(object):
     def __init__(self, elections):
         self.elections = elections
-        self.objectData = []
         self.header = [_("Institution"),
                        _("Electors"),
                        _("Voters"),
@@ -474,33 +502,79 @@ class ElectionsReport(object):
     def append_elections(self, election_list):
         self.elections += election_list
 
-    def parse_object(self):
-        data = []
-        for e in self.elections:
-            row = {}
-            row['inst'] = e.institution.name
+    def election_row(self, e):
+        row = {}
+        row['inst'] = e.institution.name
+        if hasattr(e, 'nr_voters'):
+            # COUNT(*) columns come back as long from psycopg2
+            row['nr_voters'] = int(e.nr_voters)
+            row['nr_voters_voted'] = int(e.nr_voters_voted)
+        else:
             row['nr_voters'] = e.voters.count()
             row['nr_voters_voted'] = e.voters.cast().count()
-            start = e.voting_starts_at
-            start = start.strftime("%Y-%m-%d %H:%M") if start else ''
-            end = e.voting_ended_at
-            end = end.strftime("%Y-%m-%d %H:%M") if end else ''
-            row['start'] = start
-            row['end'] = end
-            row['uuid'] = e.uuid
-            row['election_name'] = e.name
+        start = e.voting_starts_at
+        start = start.strftime("%Y-%m-%d %H:%M") if start else ''
+        end = e.voting_ended_at
+        end = end.strftime("%Y-%m-%d %H:%M") if end else ''
+        row['start'] = start
+        row['end'] = end
+        row['uuid'] = e.uuid
+        row['election_name'] = e.name
+        if hasattr(e, 'nr_polls'):
+            row['nr_polls'] = int(e.nr_polls)
+        else:
             row['nr_polls'] = e.polls.count()
-            admins = [admin.user_id for admin in e.admins.all()]
-            admins = ",".join(map(str, admins))
-            row['admin'] = admins
-            if e.official == 0:
-                row['official'] = 'Unofficial'
-            elif e.official == 1:
-                row['official'] = 'Official'
-            else:
-                row['official'] = 'Not Decided'
-            data.append(row)
-        self.objectData += data
+        admins = [admin.user_id for admin in e.admins.all()]
+        admins = ",".join(map(str, admins))
+        row['admin'] = admins
+        if e.official == 0:
+            row['official'] = 'Unofficial'
+        elif e.official == 1:
+            row['official'] = 'Official'
+        else:
+            row['official'] = 'Not Decided'
+        return row
+
+    def iter_object(self):
+        for e in self.elections:
+            yield self.election_row(e)
+
+    def lazy_object(self, count=None):
+        return LazyElectionRows(self, count)
+
+
+class LazyElectionRows(object):
+    """
+    Sequence of report rows which only builds the rows of the elections
+    actually sliced out of it, e.g. by a paginator.
+    """
+
+    def __init__(self, report, count=None):
+        self.report = report
+        self._count = count
+
+    def count(self):
+        if self._count is None:
+            self._count = self.report.elections.count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return map(self.report.election_row, self.report.elections[k])
+        return self.report.election_row(self.report.elections[k])
+
+
+class Echo(object):
+    """
+    File-like object which hands back whatever is written to it, so that
+    a csv writer can be used to produce lines one at a time.
+    """
+
+    def write(self, value):
+        return value
 
 
 class ElectionsReportCSV(ElectionsReport):
@@ -510,6 +584,9 @@ class ElectionsReportCSV(ElectionsReport):
     Includes CSV file if set in settings.
     '''
 
+    KEYS = ('inst', 'nr_voters', 'nr_voters_voted', 'start',
+            'end', 'uuid', 'election_name', 'nr_polls', 'admin', 'official')
+
     def __init__(self, elections):
         super(ElectionsReportCSV, self).__init__(elections)
         self.csvData = []
@@ -528,25 +605,21 @@ class ElectionsReportCSV(ElectionsReport):
                 data.append(new_row)
         self.csvData += data
 
-    def make_output(self, filename):
-        data = self.csvData + self.objectData
-        keys = ('inst', 'nr_voters', 'nr_voters_voted', 'start',
-                'end', 'uuid', 'election_name', 'nr_polls', 'admin', 'official')
-
-        fd = filename
-        close = False
-        if isinstance(filename, basestring):
-            fd = open("{}.csv".format(filename), 'wb')
-            close = True
-
-        writer = csv.writer(fd, delimiter=',')
-        head_row = map(lambda c: c.encode('utf-8'), self.header)
-        writer.writerow(head_row)
+    def rows(self):
+        """
+        Yield the encoded header followed by one encoded row per report
+        entry, reading the elections lazily.
+        """
+        data = chain(self.csvData, self.iter_object())
+        yield map(lambda c: c.encode('utf-8'), self.header)
         for row in data:
-            writer.writerow([row[k].encode('utf-8') if type(row[k]) != int
-                            else row[k] for k in keys])
-        if close:
-            fd.close()
+            yield [row[k] if isinstance(row[k], (int, long))
+                   else row[k].encode('utf-8') for k in self.KEYS]
+
+    def iter_output(self):
+        writer = csv.writer(Echo(), delimiter=',')
+        for row in self.rows():
+            yield writer.writerow(row)
 
 
 def csv_from_unigovgr_results(election, results, lang, outfile=None):
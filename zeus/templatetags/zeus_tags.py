@@ -298,10 +298,10 @@ def set_election_issues(context, election):
 @register.simple_tag(takes_context=True)
 def complete_get_parameters(context, GET, new_order,
                             default_sort_key='voter_login_id'):
-    page_param = ''
+    params = []
     page = GET.get('page', None)
     if page:
-        page_param += "&page=%s" % page
+        params.append(('page', page))
     order_by = GET.get('order', default_sort_key)
     order_type = GET.get('order_type', None)
     if order_type == None and order_by == 'created_at':
@@ -309,7 +309,6 @@ def complete_get_parameters(context, GET, new_order,
     elif order_type == None:
         order_type = 'asc'
 
-    order_param = ''
     if order_by == new_order:
         context['ordering_cls'] = order_type
         if order_type == 'asc':
@@ -318,15 +317,13 @@ def complete_get_parameters(context, GET, new_order,
             new_order_type = 'asc'
     else:
         new_order_type = 'asc'
-    order_param = '&order_type=%s' % new_order_type
-    filter_param = ''
+    params.append(('order_type', new_order_type))
     q = GET.get('q', None)
     if q:
-        if isinstance(q, unicode):
-            q = q.encode('utf8')
-        filter_param = '&q=%s' % urllib.quote_plus(q)
-    params = '%s%s%s' % (page_param, order_param, filter_param)
-    return params
+        params.append(('q', q))
+    params = [(key, value.encode('utf8') if isinstance(value, unicode)
+               else value) for key, value in params]
+    return '&' + urllib.urlencode(params)
 
 
 @register.simple_tag(takes_context=True)
@@ -1,8 +1,17 @@
+import os
+import datetime
+import tempfile
+
+from django.core import mail
 from django.test import TestCase
+from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
+from django.utils import translation
+from django.utils.encoding import force_text
 
+from zeus.forms import ElectionForm
 from zeus.tests.utils import SetUpAdminAndClientMixin
-from helios.models import Election
+from helios.models import Election, Poll, Voter
 
 class TestHomeView(SetUpAdminAndClientMixin, TestCase):
 
@@ -110,3 +119,94 @@ class TestHomeView(SetUpAdminAndClientMixin, TestCase):
         self.assertContains(response, '<select name="official">')
         self.assertContains(response, '<input type="submit"')
         self.assertContains(response, '<input type="hidden"')
+
+
+class TestElectionsReport(SetUpAdminAndClientMixin, TestCase):
+
+    def setUp(self):
+        super(TestElectionsReport, self).setUp()
+        self.admin.superadmin_p = True
+        self.admin.save()
+        self.c.post(self.locations['login'], self.login_data)
+
+        self.election_form['departments'] = 'test_departments'
+        self.election_form['election_module'] = 'simple'
+        self.c.post(self.locations['create'], self.election_form, follow=True)
+        self.election = Election.objects.all()[0]
+        Election.objects.filter(pk=self.election.pk).update(
+            trial=False, completed_at=datetime.datetime.now())
+
+        poll = Poll.objects.create(election=self.election, name='test_poll')
+        for i in range(2):
+            Voter.objects.create(poll=poll, uuid='voter-%d' % i,
+                                 voter_login_id='%d' % i,
+                                 voter_password='password-%d' % i)
+
+    def get_csv_rows(self):
+        response = self.c.get(reverse('elections_report_csv'))
+        self.assertEqual(response.status_code, 200)
+        content = ''.join(response.streaming_content)
+        return [line.split(',') for line in content.splitlines()]
+
+    def test_csv_report_counts(self):
+        """
+        The streamed CSV contains one row per reported election with
+        its polls and voters counted.
+        """
+        rows = self.get_csv_rows()
+        self.assertEqual(len(rows), 2)
+        row = rows[1]
+        self.assertEqual(row[0], 'test_inst')
+        self.assertEqual(row[1:3], ['2', '0'])
+        self.assertEqual(row[5], self.election.uuid)
+        self.assertEqual(row[7], '1')
+
+    def test_csv_report_streams_included_rows_first(self):
+        """
+        The CSV is streamed: the header, the rows of the configured
+        include file and then the reported elections.
+        """
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.write(fd, 'old_inst,10,5,2014-01-01 10:00,2014-01-02 10:00,'
+                     'old-uuid,old_election,admin,Official\n')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        with override_settings(ZEUS_ELECTIONS_REPORT_INCLUDE=path):
+            response = self.c.get(reverse('elections_report_csv'))
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Disposition'].startswith(
+            'attachment; filename=elections_report_'))
+
+        lines = ''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('Institution,'))
+        self.assertEqual(lines[1].split(',')[5:8],
+                         ['old-uuid', 'old_election', "'-"])
+        self.assertEqual(lines[2].split(',')[5], self.election.uuid)
+
+
+class TestElectionCreateNotification(SetUpAdminAndClientMixin, TestCase):
+
+    def test_notification_contains_terms_text(self):
+        """
+        The admins notification of a new election includes the rendered
+        terms text the admin accepted.
+        """
+        self.c.post(self.locations['login'], self.login_data)
+        self.election_form['departments'] = 'test_departments'
+        self.election_form['election_module'] = 'simple'
+        self.c.post(self.locations['create'], self.election_form,
+                    HTTP_ACCEPT_LANGUAGE='en', follow=True)
+        self.assertEqual(Election.objects.count(), 1)
+
+        with translation.override('en'):
+            terms_text = force_text(
+                ElectionForm(self.admin, self.institution).terms_text)
+        self.assertTrue(terms_text)
+        notifications = [m for m in mail.outbox
+                         if 'New election created' in m.body]
+        self.assertEqual(len(notifications), 1)
+        body = notifications[0].body
+        self.assertIn(u'Terms accepted: %s' % terms_text, body)
+        self.assertNotIn('__proxy__', body)
@@ -1,3 +1,5 @@
+import json
+
 from functools import partial
 from django.test import TestCase
 
@@ -34,3 +36,68 @@ class TestUniGovGr(TestCase):
         S, G, A, B = 115, 178, 14, 34
         self.assertEqual(UNIGOV_COUNT(A, B, G, S)[1], 18.0)
 
+
+
+class TestStvForm(TestCase):
+
+    def make_form(self, data=None, initial=None):
+        from zeus.forms import StvForm
+        initial = dict(initial or {}, departments_data='Dep A\nDep B')
+        return StvForm(data, prefix='form-0', initial=initial)
+
+    def test_candidate_values_round_trip(self):
+        form = self.make_form({
+            'form-0-eligibles': '1',
+            'form-0-answer_0_0': ' Alice ',
+            'form-0-answer_0_1': 'Dep A',
+            'form-0-answer_1_0': 'Bob',
+            'form-0-answer_1_1': 'Dep B',
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(json.loads(form.cleaned_data['answer_0']),
+                         ['Alice', 'Dep A'])
+        self.assertEqual(json.loads(form.cleaned_data['answer_1']),
+                         ['Bob', 'Dep B'])
+
+    def test_missing_department_is_null(self):
+        from zeus.forms import CandidateWidget, unpack_candidate_value
+        widget = CandidateWidget(departments=[('Dep A', 'Dep A')])
+        value = widget.value_from_datadict({'answer_0_0': 'Bob'}, {},
+                                           'answer_0')
+        self.assertEqual(unpack_candidate_value(value), ['Bob', None])
+        self.assertEqual(widget.decompress(value), ['Bob', None])
+
+        value = widget.value_from_datadict({'answer_0_0': 'Bob',
+                                            'answer_0_1': ''}, {},
+                                           'answer_0')
+        self.assertEqual(unpack_candidate_value(value), ['Bob', ''])
+
+    def test_reserved_characters_rejected(self):
+        from zeus.forms import CandidateWidget, unpack_candidate_value
+        widget = CandidateWidget(departments=[('Dep A', 'Dep A')])
+        value = widget.value_from_datadict({'answer_0_0': u'Bob\x1fDep A',
+                                            'answer_0_1': u'\x00'}, {},
+                                           'answer_0')
+        self.assertEqual(unpack_candidate_value(value),
+                         [u'Bob\x1fDep A', u'\x00'])
+
+        for name, department in ((u'Bob\x1fDep A', 'Dep B'),
+                                 (u'Bob', u'Dep\x00 A')):
+            form = self.make_form({
+                'form-0-eligibles': '1',
+                'form-0-answer_0_0': name,
+                'form-0-answer_0_1': department,
+            })
+            self.assertFalse(form.is_valid())
+            self.assertTrue(any('not a valid character' in error
+                                for error in form.non_field_errors()))
+
+    def test_stored_json_values(self):
+        from zeus.forms import CandidateWidget, unpack_candidate_value
+        stored = json.dumps([u'Alice', u'Dep A'])
+        self.assertEqual(unpack_candidate_value(stored), ['Alice', 'Dep A'])
+        widget = CandidateWidget(departments=[('Dep A', 'Dep A')])
+        self.assertEqual(widget.decompress(stored), ['Alice', 'Dep A'])
+
+        form = self.make_form(initial={'answer_0': stored})
+        self.assertIn('value="Alice"', unicode(form['answer_0']))
@@ -2,6 +2,7 @@
 
 import os
 import json
+import time
 import bleach
 import urlparse
 import markdown
@@ -21,6 +22,8 @@ from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 from django.core.validators import validate_email, ValidationError
 from django.core.exceptions import SuspiciousOperation
+from django.utils.lru_cache import lru_cache
+from django.core.cache import cache
 
 
 ALLOWED_TAGS = [u'h1', u'h2', u'h3', u'h4', u'h5', u'table', u'thead', u'tbody',
@@ -326,6 +329,23 @@ def get_filters(q_param, table_headers, search_fields, bool_keys_map, extra_head
                 q = q & Q(**{'%s%s' % (key, flt): arg_type})
     return q
 
+_FILTER_SETS = {
+    'elections': (ELECTION_TABLE_HEADERS, ELECTION_SEARCH_FIELDS,
+                  ELECTION_BOOL_KEYS_MAP),
+    'reports': (REPORT_TABLE_HEADERS, REPORT_SEARCH_FIELDS,
+                REPORT_BOOL_KEYS_MAP),
+}
+
+
+@lru_cache(maxsize=256)
+def get_cached_filters(kind, q_param):
+    """
+    get_filters() for one of the module level filter sets in
+    _FILTER_SETS, memoized per q_param. Q objects are not mutated when
+    passed to filter() or combined, so the cached ones can be shared.
+    """
+    return get_filters(q_param, *_FILTER_SETS[kind])
+
 def get_voters_filters_with_constraints(q_param=None, constraints_include=None,
                                         constraints_exclude=None):
     q = Q()
@@ -535,6 +555,64 @@ def safe_unlink(path):
         os.unlink(path)
 
 
+def get_cache_version(key):
+    """
+    Return the version number stored under key. A missing version (never
+    set or culled by the cache) starts from the current time in
+    milliseconds so that it never matches a version already in use.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(key):
+    """
+    Increase the version number stored under key, invalidating every
+    cache entry that embeds it.
+    """
+    try:
+        cache.incr(key)
+    except ValueError:
+        get_cache_version(key)
+
+
+def admin_home_count_version_key(admin_id=None):
+    # superadmins list every election, so their counts share one version
+    if admin_id is None:
+        return 'adminhome-count-version:all'
+    return 'adminhome-count-version:%d' % admin_id
+
+
+def bump_admin_home_count(admin_ids):
+    for admin_id in admin_ids:
+        bump_cache_version(admin_home_count_version_key(admin_id))
+    bump_cache_version(admin_home_count_version_key())
+
+
+TERMS_CACHE_TIMEOUT = getattr(settings, 'ZEUS_TERMS_CACHE_TIMEOUT', 300)
+
+
+def terms_cache_key(user_pk, name):
+    version = get_cache_version('terms-version:%d' % user_pk)
+    return 'terms-%s:%d:%d' % (name, user_pk, version)
+
+
+def bump_terms_cache(user_pk):
+    bump_cache_version('terms-version:%d' % user_pk)
+
+
+def cached_terms_options(user):
+    key = terms_cache_key(user.pk, 'options')
+    options = cache.get(key)
+    if options is None:
+        options = resolve_terms_options(user)
+        cache.set(key, options, TERMS_CACHE_TIMEOUT)
+    return options
+
+
 def resolve_terms_options(user):
     all_options = getattr(settings, 'TERMS_CONSENT_OPTIONS_MAP', {})
     _ = lambda x: x
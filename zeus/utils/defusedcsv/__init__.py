@@ -27,10 +27,10 @@ class ProxyWriter:
         self.writer = writer
 
     def writerow(self, row):
-        self.writer.writerow([escape(field) for field in row])
+        return self.writer.writerow([escape(field) for field in row])
 
     def writerows(self, rows):
-        self.writer.writerows([[escape(field) for field in row] for row in rows])
+        return self.writer.writerows([[escape(field) for field in row] for row in rows])
 
     def __getattr__(self, item):
         return getattr(self.writer, item)
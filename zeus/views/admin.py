@@ -1,21 +1,62 @@
 import copy
 import datetime
-import cStringIO as StringIO
+import hashlib
 
-from django.http import HttpResponseRedirect, HttpResponse
+from collections import defaultdict
+
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from django.core.urlresolvers import reverse
 from django.conf import settings
+from django.db import transaction
+from django.core.cache import cache
 from django.contrib import messages
 from django.views.generic import View
 
-from zeus.reports import ElectionsReportCSV, ElectionsReport
+from zeus.reports import ElectionsReportCSV, ElectionsReport, \
+    annotate_report_counts
 from zeus.utils import render_template, ELECTION_TABLE_HEADERS,\
-    get_filters, ELECTION_SEARCH_FIELDS, ELECTION_BOOL_KEYS_MAP,\
-    REPORT_TABLE_HEADERS, REPORT_SEARCH_FIELDS, REPORT_BOOL_KEYS_MAP
+    get_cached_filters, REPORT_TABLE_HEADERS, admin_home_count_version_key,\
+    bump_admin_home_count, get_cache_version
 
 from zeus import auth
 
-from helios.models import Election
+from helios.models import Election, Poll, Voter
+
+
+ADMIN_HOME_COUNT_CACHE_TIMEOUT = getattr(settings,
+                                         'ZEUS_ADMIN_HOME_COUNT_CACHE_TIMEOUT',
+                                         60)
+
+
+class CachedCountElections(object):
+    """
+    Wraps the admin home queryset so that the paginator's count is
+    shared, for a short while, between the pages of the same listing.
+    """
+
+    def __init__(self, elections, admin, q_param):
+        self.elections = elections
+        admin_id = None if admin.superadmin_p else admin.pk
+        version = get_cache_version(admin_home_count_version_key(admin_id))
+        q_hash = hashlib.md5(q_param.encode('utf-8')).hexdigest()
+        self.cache_key = 'adminhome-count:%s:%d:%s' % (admin_id or 'all',
+                                                       version, q_hash)
+
+    def count(self):
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = self.elections.count()
+            cache.set(self.cache_key, count, ADMIN_HOME_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self.elections)
+
+    def __getitem__(self, k):
+        return self.elections[k]
 
 
 class HomeView(View):
@@ -38,20 +79,21 @@ class HomeView(View):
             order_by = 'name'
 
         elections = Election.objects.administered_by(request.admin)
-        nr_unfiltered_elections = elections.count()
-        if nr_unfiltered_elections == 0:
+        if not elections.exists():
             return HttpResponseRedirect(reverse('election_create'))
 
-        elections = elections.filter(get_filters(q_param, ELECTION_TABLE_HEADERS,
-                                                 ELECTION_SEARCH_FIELDS,
-                                                 ELECTION_BOOL_KEYS_MAP))
-        elections = elections.order_by(order_by)
-        if order_type == 'desc':
-            elections = elections.reverse()
+        elections = elections.filter(get_cached_filters('elections', q_param))
+        prefix = '-' if order_type == 'desc' else ''
+        elections = elections.order_by(prefix + order_by)
+        # the template renders institution, first admin and status_display,
+        # the latter walking every poll of the election
+        elections = elections.select_related('institution')
+        elections = elections.prefetch_related('admins', 'polls')
 
         context = {
             'is_superadmin': request.admin.superadmin_p,
-            'elections_administered': elections,
+            'elections_administered': CachedCountElections(
+                elections, request.admin, q_param),
             'election_table_headers': ELECTION_TABLE_HEADERS.iteritems(),
             'q': q_param,
             'page': page,
@@ -65,18 +107,24 @@ class HomeView(View):
         official = request.POST.getlist('official', '')
         uuid = request.POST.getlist('uuid', None)
 
+        groups = defaultdict(list)
         for status, id in zip(official, uuid):
-            try:
-                election = Election.objects.get(uuid=id)
-                if status == '':
-                    status = None
-                else:
+            if status == '':
+                status = None
+            else:
+                try:
                     status = int(status)
-
-                election.official = status
-                election.save()
-            except:
-                pass
+                except ValueError:
+                    continue
+            groups[status].append(id)
+
+        # update() bypasses save(), so keep modified_at in sync by hand
+        now = datetime.datetime.now()
+        with transaction.atomic():
+            for status, uuids in groups.iteritems():
+                Election.objects.filter(uuid__in=uuids).update(
+                    official=status, modified_at=now)
+        bump_admin_home_count([request.admin.pk])
 
         return HttpResponseRedirect(reverse('admin_home'))
 
@@ -107,23 +155,18 @@ def find_elections(request):
         filter['voting_starts_at__lte'] = datetime.strptime(end_date, "%d %b %Y")
 
     # filter by query
-    q_filters = get_filters(
-        q,
-        REPORT_TABLE_HEADERS,
-        REPORT_SEARCH_FIELDS,
-        REPORT_BOOL_KEYS_MAP
-    )
+    q_filters = get_cached_filters('reports', q)
 
     if not order_by in ELECTION_TABLE_HEADERS:
         order_by = 'completed_at'
 
-    elections = Election.objects.filter(**filter).order_by(order_by)
+    prefix = '-' if order_type == 'desc' else ''
+    elections = Election.objects.filter(**filter).order_by(prefix + order_by)
     elections = elections.filter(q_filters)
 
-    if order_type == 'desc':
-        elections = elections.reverse()
-
-    return elections
+    elections = elections.select_related('institution')
+    elections = elections.prefetch_related('admins')
+    return annotate_report_counts(elections)
 
 @auth.manager_or_superadmin_required
 def elections_report_csv(request):
@@ -136,16 +179,13 @@ def elections_report_csv(request):
     csv_path = getattr(settings, 'ZEUS_ELECTIONS_REPORT_INCLUDE', None)
     if csv_path:
         report.parse_csv(csv_path)
-    report.parse_object()
     # ext is not needed
     date = datetime.datetime.now()
     str_date = date.strftime("%Y-%m-%d")
     filename = 'elections_report_' + str_date
-    fd = StringIO.StringIO()
-    report.make_output(fd)
-    fd.seek(0)
 
-    response = HttpResponse(fd, content_type='application/csv')
+    response = StreamingHttpResponse(report.iter_output(),
+                                     content_type='application/csv')
     response['Content-Disposition'] = 'attachment; filename=%s.csv' % filename
     return response
 
@@ -156,27 +196,23 @@ def elections_report(request):
     """
     q_param = request.GET.get('q', '')
 
-    polls_count = votes_count = voters_count = 0
-    percentage_voted = voters_voted_count = 0
+    percentage_voted = 0
 
     elections = find_elections(request)
 
-    report = ElectionsReport(elections)
-    report.parse_object()
-
-    elections_count = len(report.objectData)
-    for election in report.objectData:
-        polls_count += election['nr_polls']
-        voters_count += election['nr_voters']
-        voters_voted_count += election['nr_voters_voted']
+    elections_count = elections.count()
+    polls_count = Poll.objects.filter(election__in=elections).count()
+    voters = Voter.objects.filter(poll__election__in=elections)
+    voters_count = voters.count()
+    voters_voted_count = voters.cast().count()
 
-    if not voters_count is 0:
+    if voters_count:
         percentage_voted = (voters_voted_count / float(voters_count)) * 100
 
-    params = ''
-    for key, value in request.GET.items():
-        params = params + key + '=' + value + '&'
-    params = params[:-1]
+    # only the rows of the displayed page get built
+    report = ElectionsReport(elections)
+
+    params = request.GET.urlencode()
 
     context = {
         'elections_count': elections_count,
@@ -184,7 +220,7 @@ def elections_report(request):
         'voters_count': voters_count,
         'voters_voted_count': voters_voted_count,
         'percentage_voted': percentage_voted,
-        'elections': report.objectData,
+        'elections': report.lazy_object(elections_count),
         'elections_per_page': 10,
         'report_table_headers': REPORT_TABLE_HEADERS.items(),
         'params': params,
@@ -56,9 +56,10 @@ def add_or_update(request, election=None):
                 election.admins.add(user)
             if election_form.creating:
                 election.logger.info("Election created")
-                # report terms text
-                election.logger.info(u"Terms accepted: '%s'", election_form.terms_text)
-                msg = "New election created. \n\nTerms accepted: %s" % election_form.terms_text
+                # report terms text, rendering the form's lazy terms html
+                terms_text = smart_unicode(election_form.terms_text)
+                election.logger.info(u"Terms accepted: '%s'", terms_text)
+                msg = u"New election created. \n\nTerms accepted: %s" % terms_text
                 subject = "New Zeus election"
                 election.notify_admins(msg=safe(msg), subject=subject)
             if not election.has_helios_trustee():
@@ -1,11 +1,11 @@
 import os
+import codecs
 import logging
 import uuid
 import json
 
 from collections import defaultdict, namedtuple
 from time import time
-from random import randint
 
 from django.core.urlresolvers import reverse
 from django.http import HttpResponseRedirect, HttpResponseNotAllowed, \
@@ -16,8 +16,10 @@ from django.template.loader import render_to_string
 from django.utils.translation import ugettext_lazy as _, get_language
 from django.contrib import messages
 from django.conf import settings
+from django.core.cache import cache
 from django.views.i18n import set_language
 from django.forms.formsets import formset_factory
+from django.utils.lru_cache import lru_cache
 
 from helios.view_utils import render_template
 from heliosauth.auth_systems.password import make_password
@@ -30,10 +32,12 @@ from zeus.auth import ZeusUser, superadmin_required
 from zeus.stv_count_reports import stv_count_and_report
 
 from django.core.servers.basehttp import FileWrapper
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 
 logger = logging.getLogger(__name__)
 
+_LANGUAGE_CODES = frozenset(lang[0] for lang in settings.LANGUAGES)
+
 
 def stv_count(request):
 
@@ -92,8 +96,9 @@ def stv_count(request):
         if not os.path.exists(filename):
             return HttpResponseRedirect(reverse('stv_count') + "?reset=1")
 
-        wrapper = FileWrapper(file(filename))
-        response = HttpResponse(wrapper, content_type='application/pdf')
+        wrapper = FileWrapper(open(filename, 'rb'))
+        response = StreamingHttpResponse(wrapper,
+                                         content_type='application/pdf')
         response['Content-Disposition'] = 'attachment; filename=%s' % os.path.basename(filename)
         response['Content-Length'] = os.path.getsize(filename)
         return response
@@ -103,8 +108,8 @@ def stv_count(request):
         _uuid = str(uuid.uuid4())
         files = stv_count_and_report(_uuid, el_data)
         json_file = os.path.join('/tmp', 'json-stv-results-%s' % _uuid)
-        with file(json_file, 'w') as f:
-            f.write(json.dumps(el_data, ensure_ascii=False).encode('utf8'))
+        with codecs.open(json_file, 'w', 'utf-8') as f:
+            json.dump(el_data, f, ensure_ascii=False)
         files.append(('json', json_file))
         session['results'] = dict(files)
         request.session['stvcount'] = session
@@ -117,7 +122,7 @@ def stv_count(request):
 
 def setlang(request):
     lang = request.REQUEST.get('language')
-    if not lang in map(lambda x:x[0], settings.LANGUAGES):
+    if lang not in _LANGUAGE_CODES:
         return HttpResponseRedirect(reverse('home'))
     return set_language(request)
 
@@ -146,15 +151,18 @@ def terms(request):
     if terms_file is None:
         return HttpResponseRedirect(reverse('home'))
 
-    terms_fd = file(terms_file % {'lang': get_language()}, 'r')
-    terms_contents = terms_fd.read()
-    terms_fd.close()
-
+    terms_contents = _read_terms_file(terms_file % {'lang': get_language()})
     return render_template(request, "zeus/terms", {
         'content': terms_contents
     })
 
 
+@lru_cache(maxsize=16)
+def _read_terms_file(path):
+    with open(path, 'r') as terms_fd:
+        return terms_fd.read()
+
+
 
 def faqs_trustee(request):
     user = request.zeususer
@@ -190,17 +198,14 @@ class Guides(object):
 
         fallback = getattr(settings, 'I18N_TEMPLATES_FALLBACK_LANGUAGE', 'en')
         static = getattr(settings, 'STATIC_URL')
+        base_exts = map(make_ext, extensions) or [{"ext": '', "label": ''}]
         for language in languages:
-            exts = map(make_ext, extensions)
             lang = "_%s" % language if language != 'el' else ''
             base_url = static + "manuals/" + fname + lang + '.'
-            if not exts:
-                exts = [{"ext": '', "label": ''}]
-            url = base_url + exts[0].get('ext')
+            exts = [dict(ext, url=base_url + ext['ext']) for ext in base_exts]
+            url = exts[0]['url']
             if fname.startswith("http"):
                 url = fname
-            for extension in exts:
-                extension["url"] = base_url + extension.get('ext')
 
             guides[language].append({
                 "label": _(label),
@@ -275,11 +280,14 @@ def stats(request):
     elections = elections.order_by('-created_at')
 
     if uuid:
-        try:
-            election = elections.get(uuid=uuid)
-        except Election.DoesNotExist:
+        election = elections.filter(uuid=uuid).first()
+        if election is None:
             return HttpResponseRedirect(reverse('home'))
 
+    # the dropdown only shows these, skip the large per election fields
+    elections = elections.select_related('institution').only(
+        'uuid', 'name', 'created_at', 'institution__name')
+
     return render_template(request, 'zeus/stats', {
         'menu_active': 'stats',
         'election': election,
@@ -289,8 +297,16 @@ def stats(request):
     })
 
 
-_demo_addresses = defaultdict(int)
-_demo_emails_per_address = defaultdict(set)
+DEMO_EMAILS_CACHE_TIMEOUT = getattr(settings, 'DEMO_EMAILS_CACHE_TIMEOUT',
+                                    24 * 60 * 60)
+
+
+def _demo_submitted_recently(client_address):
+    return cache.get('demo:ts:%s' % client_address) is not None
+
+
+def _demo_emails(client_address):
+    return cache.get('demo:emails:%s' % client_address, set())
 
 
 def _get_demo_user(email_address):
@@ -312,37 +328,27 @@ def _get_demo_user(email_address):
     except Institution.DoesNotExist:
         return None, ''
 
-    tries = 10
-    while tries > 0:
-        user_id = "demo_%d" % randint(1000, 1000000)
-        try:
-            User.objects.get(user_id=user_id)
-        except User.DoesNotExist:
-            break
-        tries -= 1
-
-    if tries <= 0:
-        return None, ''
-
     demogroup = None
     try:
         demogroup = UserGroup.objects.get(name="demo")
     except UserGroup.DoesNotExist:
         pass
-    newuser = User()
-    newuser.user_type = "password"
-    newuser.admin_p = True
-    newuser.info = {'name': email_address,
-                    'password': make_password(password)}
-    newuser.name = email_address
-    newuser.user_id = user_id
-    newuser.superadmin_p = False
-    newuser.institution = inst
-    newuser.ecounting_account = False
-    newuser.save()
+
+    user_id = "demo_%s" % uuid.uuid4().hex[:12]
+    newuser, created = User.objects.get_or_create(user_id=user_id, defaults={
+        'user_type': "password",
+        'admin_p': True,
+        'info': {'name': email_address,
+                 'password': make_password(password)},
+        'name': email_address,
+        'superadmin_p': False,
+        'institution': inst,
+        'ecounting_account': False,
+    })
+    if not created:
+        return None, ''
     if demogroup:
         newuser.user_groups.add(demogroup)
-        newuser.save()
     return newuser, password
 
 
@@ -364,9 +370,7 @@ def account_request(request):
         messages.error(request, msg)
         return HttpResponseRedirect(home)
 
-    now_seconds = int(time())
-    last_seconds = _demo_addresses[client_address]
-    if now_seconds - last_seconds < settings.DEMO_SUBMIT_INTERVAL_SECONDS:
+    if _demo_submitted_recently(client_address):
         msg = _("There are too many requests from your address")
         messages.error(request, msg)
         return HttpResponseRedirect(home)
@@ -401,14 +405,12 @@ def demo(request):
         messages.error(request, msg)
         return HttpResponseRedirect(reverse('home'))
 
-    now_seconds = int(time())
-    last_seconds = _demo_addresses[client_address]
-    if now_seconds - last_seconds < settings.DEMO_SUBMIT_INTERVAL_SECONDS:
+    if _demo_submitted_recently(client_address):
         msg = _("There are too many requests from your address")
         messages.error(request, msg)
         return HttpResponseRedirect(reverse('home'))
 
-    emails = _demo_emails_per_address[client_address]
+    emails = _demo_emails(client_address)
     if email_address not in emails and len(emails) >= settings.DEMO_EMAILS_PER_IP:
         msg = _("There are too many emails registered from your address")
         messages.error(request, msg)
@@ -421,6 +423,8 @@ def demo(request):
         return HttpResponseRedirect(reverse('home'))
 
     emails.add(email_address)
+    cache.set('demo:emails:%s' % client_address, emails,
+              DEMO_EMAILS_CACHE_TIMEOUT)
     mail_subject = render_to_string('email/demo_email_subject.txt',
                                     {'settings': settings}).strip()
     mail_body = render_to_string('email/demo_email_body.txt',
@@ -429,7 +433,8 @@ def demo(request):
                                   'password': password})
     mail_from = _(settings.DEFAULT_FROM_NAME)
     mail_from += ' <%s>' % settings.DEFAULT_FROM_EMAIL
-    _demo_addresses[client_address] = now_seconds
+    cache.set('demo:ts:%s' % client_address, int(time()),
+              settings.DEMO_SUBMIT_INTERVAL_SECONDS)
 
     msg = _("An email with demo credentials has been sent to %s") % email_address
     messages.success(request, msg)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import datetime
 
-from time import strptime, strftime
+from time import strftime
 from django import forms
 from django.db import models
 from django.forms import fields
@@ -13,13 +13,10 @@ from django.forms.widgets import Select, MultiWidget, DateInput, TextInput
 from time import strftime
 
 
-hour_selections = [('','')]
-for t in range(24):
-    hour_selections.extend([("%02d:00" % t, "%02d:00" % t),
-                            ("%02d:15" % t, "%02d:15" % t),
-                            ("%02d:30" % t, "%02d:30" % t),
-                            ("%02d:45" % t, "%02d:45" % t)])
-hour_selections.append(('23:59', '23:59'))
+hour_selections = (('', ''),) + \
+    tuple(("%02d:%02d" % divmod(m, 60),) * 2 for m in range(0, 24 * 60, 15)) + \
+    (('23:59', '23:59'),)
+_HOUR_SET = frozenset(value for value, label in hour_selections)
 
 
 class JqSplitDateTimeWidget(MultiWidget):
@@ -48,7 +45,7 @@ class JqSplitDateTimeWidget(MultiWidget):
             timetuple = value.timetuple()
             d = strftime("%Y-%m-%d", timetuple)
             timeofday = strftime("%H:%M", timetuple)
-            if not timeofday in dict(hour_selections).keys():
+            if timeofday not in _HOUR_SET:
                 timeofday = strftime("%H:00",timetuple)
             return [d, timeofday]
         else:
@@ -93,10 +90,9 @@ class JqSplitDateTimeField(fields.MultiValueField):
             if not (data_list[0] and data_list[1]):
                 raise forms.ValidationError("Field is missing data.")
             try:
-                input_time = strptime("%s" %(data_list[1]), "%H:%M")
-                datetime_string = "%s %s" % (data_list[0], strftime('%H:%M', input_time))
-                return datetime.datetime(*strptime(datetime_string,
-                                                "%Y-%m-%d %H:%M")[0:6])
-            except ValueError:
+                hh, mm = map(int, data_list[1].split(':'))
+                yyyy, mo, dd = map(int, data_list[0].split('-'))
+                return datetime.datetime(yyyy, mo, dd, hh, mm)
+            except (ValueError, TypeError):
                 raise forms.ValidationError("Wrong date or time format")
         return None